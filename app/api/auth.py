@@ -1,49 +1,139 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+import asyncio
+import hashlib
+import time
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import timedelta
+from typing import Optional
+from cachetools import TTLCache
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.core.security import (
     get_password_hash,
     verify_password,
+    password_needs_rehash,
     create_access_token,
     decode_access_token
 )
 from app.core.database import get_supabase_client
+from app.core.db_pool import fetch_user
+from app.core.http_cache import apply_cache_headers
 from app.config import get_settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 security = HTTPBearer()
 settings = get_settings()
 
+# Short-lived caches so repeat requests with the same token skip the
+# HMAC verify and the Supabase user lookup
+_payload_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+_user_cache: TTLCache = TTLCache(maxsize=5000, ttl=60)
+
+# In-flight user fetches keyed by user_id, so N concurrent cache misses
+# for the same user collapse into one query
+_inflight_users: dict = {}
+
+# Login throttle: bcrypt burns ~100ms of CPU per verify, so cap attempts
+# per email before doing any database or hashing work
+_login_attempts: TTLCache = TTLCache(maxsize=50000, ttl=60)
+_MAX_LOGIN_ATTEMPTS = 5
+
+
+def _token_claims(user: dict) -> dict:
+    """Build JWT claims carrying the profile fields the API needs.
+
+    The token is signed, so these are tamper-proof within its lifetime
+    and let dependencies resolve the user without a database read.
+    """
+    return {
+        "sub": user["email"],
+        "user_id": user["id"],
+        "name": user.get("name"),
+        "plan_type": user.get("plan_type", "free"),
+        "created_at": user["created_at"]
+    }
+
+
+def get_cached_token_payload(token: str) -> Optional[dict]:
+    """Decode a JWT, caching the payload keyed by a hash of the token"""
+    key = hashlib.sha256(token.encode()).hexdigest()[:32]
+
+    payload = _payload_cache.get(key)
+    if payload is None:
+        payload = decode_access_token(token)
+        if payload is not None:
+            _payload_cache[key] = payload
+
+    # The cache TTL may outlive the token, so always re-check expiry
+    if payload is not None and payload.get("exp", 0) <= time.time():
+        return None
+
+    return payload
+
+
+async def get_cached_user(user_id: str) -> Optional[dict]:
+    """Fetch a user row by id, caching the result briefly.
+
+    Concurrent misses for the same id await a single in-flight fetch
+    instead of each issuing their own query.
+    """
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    inflight = _inflight_users.get(user_id)
+    if inflight is not None:
+        return await inflight
+
+    future: asyncio.Future = asyncio.get_event_loop().create_future()
+    _inflight_users[user_id] = future
+    try:
+        # Primary-key lookup goes straight to Postgres when a direct DSN
+        # is configured; otherwise fall back to PostgREST
+        user = await fetch_user(user_id)
+        if user is None:
+            supabase = get_supabase_client()
+            result = await asyncio.to_thread(
+                lambda: supabase.table("users")
+                .select("id,email,name,plan_type,created_at")
+                .eq("id", user_id)
+                .execute()
+            )
+            if result.data:
+                user = result.data[0]
+
+        if user is not None:
+            _user_cache[user_id] = user
+        future.set_result(user)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        _inflight_users.pop(user_id, None)
+
+    return user
+
 
 @router.post("/signup", response_model=Token, status_code=status.HTTP_201_CREATED)
 async def signup(user: UserCreate):
     """Register a new user"""
     supabase = get_supabase_client()
 
-    # Check if user already exists
-    existing_user = supabase.table("users").select("*").eq("email", user.email).execute()
-    if existing_user.data:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-
     # Hash password
     hashed_password = get_password_hash(user.password)
 
-    # Create user in database
-    new_user = supabase.table("users").insert({
-        "email": user.email,
-        "name": user.name,
-        "password_hash": hashed_password,
-        "plan_type": "free"
+    # Insert unless the email already exists (single round-trip, no
+    # check-then-insert race); no rows back means a conflict
+    new_user = supabase.rpc("create_user_if_absent", {
+        "p_email": user.email,
+        "p_name": user.name,
+        "p_password_hash": hashed_password
     }).execute()
 
     if not new_user.data:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create user"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
         )
 
     user_data = new_user.data[0]
@@ -51,7 +141,7 @@ async def signup(user: UserCreate):
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user_data["email"], "user_id": user_data["id"]},
+        data=_token_claims(user_data),
         expires_delta=access_token_expires
     )
 
@@ -64,10 +154,21 @@ async def signup(user: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(credentials: UserLogin):
     """Login with email and password"""
+    attempts = _login_attempts.get(credentials.email, 0) + 1
+    _login_attempts[credentials.email] = attempts
+    if attempts > _MAX_LOGIN_ATTEMPTS:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later"
+        )
+
     supabase = get_supabase_client()
 
-    # Get user by email
-    result = supabase.table("users").select("*").eq("email", credentials.email).execute()
+    # Get user by email (only the columns the response and verify need)
+    result = supabase.table("users") \
+        .select("id,email,password_hash,name,plan_type,created_at") \
+        .eq("email", credentials.email) \
+        .execute()
 
     if not result.data:
         raise HTTPException(
@@ -84,10 +185,17 @@ async def login(credentials: UserLogin):
             detail="Invalid email or password"
         )
 
+    # Transparently migrate legacy bcrypt hashes to argon2 on login
+    if password_needs_rehash(user["password_hash"]):
+        supabase.table("users") \
+            .update({"password_hash": get_password_hash(credentials.password)}) \
+            .eq("id", user["id"]) \
+            .execute()
+
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["email"], "user_id": user["id"]},
+        data=_token_claims(user),
         expires_delta=access_token_expires
     )
 
@@ -97,10 +205,9 @@ async def login(credentials: UserLogin):
     )
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+def _validated_payload(token: str) -> dict:
+    """Decode a token and check the identity claims, raising 401 otherwise"""
+    payload = get_cached_token_payload(token)
 
     if payload is None:
         raise HTTPException(
@@ -108,28 +215,69 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid authentication credentials"
         )
 
-    email = payload.get("sub")
-    user_id = payload.get("user_id")
-
-    if email is None or user_id is None:
+    if payload.get("sub") is None or payload.get("user_id") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
 
-    supabase = get_supabase_client()
-    result = supabase.table("users").select("*").eq("id", user_id).execute()
+    return payload
 
-    if not result.data:
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Get the current authenticated user from the JWT claims"""
+    payload = _validated_payload(credentials.credentials)
+
+    # The signed token carries the profile fields, so no database read;
+    # tokens issued before the claims were added fall back to a lookup
+    if payload.get("created_at") is not None:
+        return {
+            "id": payload["user_id"],
+            "email": payload["sub"],
+            "name": payload.get("name"),
+            "plan_type": payload.get("plan_type", "free"),
+            "created_at": payload["created_at"]
+        }
+
+    user = await get_cached_user(payload["user_id"])
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+
+    return user
+
+
+async def get_fresh_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Get the current user with a fresh database read.
+
+    Use instead of get_current_user when a handler must see profile
+    changes (e.g. plan upgrades) made after the token was issued.
+    """
+    payload = _validated_payload(credentials.credentials)
+
+    user = await get_cached_user(payload["user_id"])
+
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
-    return result.data[0]
+    return user
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: dict = Depends(get_current_user)):
+async def get_me(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
     """Get current user information"""
+    not_modified = apply_cache_headers(request, response, current_user)
+    if not_modified is not None:
+        return not_modified
+
     return UserResponse(**current_user)
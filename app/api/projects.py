@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+import asyncio
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from typing import List, Optional
 from app.schemas.project import (
     ProjectCreate,
     ProjectUpdate,
@@ -7,10 +10,65 @@ from app.schemas.project import (
     TranscriptionResponse
 )
 from app.core.database import get_supabase_client
+from app.core.http_cache import apply_cache_headers
 from app.api.auth import get_current_user
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
+# Rows on the list paths come straight from our own tables, so they can
+# skip Pydantic validation via model_construct; filter to the model's
+# fields once so stray keys (e.g. embedded join columns) don't leak in
+_PROJECT_FIELDS = frozenset(ProjectResponse.model_fields)
+_TRANSCRIPTION_FIELDS = frozenset(TranscriptionResponse.model_fields)
+
+
+def _parse_row_datetimes(row: dict) -> dict:
+    """Parse PostgREST's timestamp strings to datetime objects.
+
+    model_construct skips validation, so without this the constructed
+    models would serialize raw strings (and in a different format than
+    the validated endpoints).
+    """
+    for field in ("created_at", "updated_at"):
+        value = row.get(field)
+        if isinstance(value, str):
+            row[field] = datetime.fromisoformat(value)
+    return row
+
+# In-flight project fetches keyed by (project_id, user_id), so N
+# concurrent requests for the same project collapse into one query
+_inflight_projects: dict = {}
+
+
+async def _fetch_project(project_id: str, user_id: str) -> Optional[dict]:
+    """Fetch a project row, coalescing concurrent identical fetches"""
+    key = (project_id, user_id)
+
+    inflight = _inflight_projects.get(key)
+    if inflight is not None:
+        return await inflight
+
+    future: asyncio.Future = asyncio.get_event_loop().create_future()
+    _inflight_projects[key] = future
+    try:
+        supabase = get_supabase_client()
+        result = await asyncio.to_thread(
+            lambda: supabase.table("projects")
+            .select("id,user_id,name,description,status,created_at,updated_at")
+            .eq("id", project_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        row = result.data[0] if result.data else None
+        future.set_result(row)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        _inflight_projects.pop(key, None)
+
+    return row
+
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_project(
@@ -37,40 +95,54 @@ async def create_project(
 
 
 @router.get("", response_model=List[ProjectResponse])
-async def get_projects(current_user: dict = Depends(get_current_user)):
+async def get_projects(
+        request: Request,
+        response: Response,
+        current_user: dict = Depends(get_current_user)
+):
     """Get all projects for the current user"""
     supabase = get_supabase_client()
 
+    # List views don't need descriptions
     result = supabase.table("projects") \
-        .select("*") \
+        .select("id,user_id,name,status,created_at,updated_at") \
         .eq("user_id", current_user["id"]) \
         .order("created_at", desc=True) \
         .execute()
 
-    return [ProjectResponse(**project) for project in result.data]
+    not_modified = apply_cache_headers(request, response, result.data)
+    if not_modified is not None:
+        return not_modified
+
+    return [
+        ProjectResponse.model_construct(
+            **_parse_row_datetimes({k: v for k, v in project.items() if k in _PROJECT_FIELDS})
+        )
+        for project in result.data
+    ]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
         project_id: str,
+        request: Request,
+        response: Response,
         current_user: dict = Depends(get_current_user)
 ):
     """Get a specific project"""
-    supabase = get_supabase_client()
-
-    result = supabase.table("projects") \
-        .select("*") \
-        .eq("id", project_id) \
-        .eq("user_id", current_user["id"]) \
-        .execute()
+    project = await _fetch_project(project_id, current_user["id"])
 
-    if not result.data:
+    if project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
 
-    return ProjectResponse(**result.data[0])
+    not_modified = apply_cache_headers(request, response, project)
+    if not_modified is not None:
+        return not_modified
+
+    return ProjectResponse(**project)
 
 
 @router.patch("/{project_id}", response_model=ProjectResponse)
@@ -82,29 +154,38 @@ async def update_project(
     """Update a project"""
     supabase = get_supabase_client()
 
-    # Verify project belongs to user
-    existing = supabase.table("projects") \
-        .select("*") \
-        .eq("id", project_id) \
-        .eq("user_id", current_user["id"]) \
-        .execute()
-
-    if not existing.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-
-    # Update project
     update_data = project_update.model_dump(exclude_unset=True)
+
     if not update_data:
+        # Nothing to change; fetch and return the current row
+        existing = supabase.table("projects") \
+            .select("id,user_id,name,description,status,created_at,updated_at") \
+            .eq("id", project_id) \
+            .eq("user_id", current_user["id"]) \
+            .execute()
+
+        if not existing.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+
         return ProjectResponse(**existing.data[0])
 
+    # Ownership is enforced by the WHERE clause: an empty result means
+    # the project doesn't exist or belongs to someone else
     updated = supabase.table("projects") \
         .update(update_data) \
         .eq("id", project_id) \
+        .eq("user_id", current_user["id"]) \
         .execute()
 
+    if not updated.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
     return ProjectResponse(**updated.data[0])
 
 
@@ -116,51 +197,49 @@ async def delete_project(
     """Delete a project"""
     supabase = get_supabase_client()
 
-    # Verify project belongs to user
-    existing = supabase.table("projects") \
-        .select("*") \
+    # Ownership is enforced by the WHERE clause: no rows deleted means
+    # the project doesn't exist or belongs to someone else
+    deleted = supabase.table("projects") \
+        .delete() \
         .eq("id", project_id) \
         .eq("user_id", current_user["id"]) \
         .execute()
 
-    if not existing.data:
+    if not deleted.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
 
-    # Delete project
-    supabase.table("projects").delete().eq("id", project_id).execute()
-
     return None
 
 
 @router.get("/{project_id}/transcriptions", response_model=List[TranscriptionResponse])
 async def get_project_transcriptions(
         project_id: str,
+        request: Request,
+        response: Response,
         current_user: dict = Depends(get_current_user)
 ):
     """Get all transcriptions for a project"""
     supabase = get_supabase_client()
 
-    # Verify project belongs to user
-    project = supabase.table("projects") \
-        .select("*") \
-        .eq("id", project_id) \
-        .eq("user_id", current_user["id"]) \
-        .execute()
-
-    if not project.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-
-    # Get transcriptions
+    # Ownership is enforced by filtering on the joined project row, so
+    # no separate pre-check query is needed
     result = supabase.table("transcriptions") \
-        .select("*") \
+        .select("id,project_id,language,file_url,transcript_text,srt_content,duration,status,created_at,projects!inner(user_id)") \
         .eq("project_id", project_id) \
+        .eq("projects.user_id", current_user["id"]) \
         .order("created_at", desc=True) \
         .execute()
 
-    return [TranscriptionResponse(**t) for t in result.data]
+    not_modified = apply_cache_headers(request, response, result.data)
+    if not_modified is not None:
+        return not_modified
+
+    return [
+        TranscriptionResponse.model_construct(
+            **_parse_row_datetimes({k: v for k, v in t.items() if k in _TRANSCRIPTION_FIELDS})
+        )
+        for t in result.data
+    ]
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.schemas.user import SignupRequest, LoginRequest, UserResponse
 from app.services.supabase_service import supabase
-from app.schemas.config import settings
-import jwt
+from app.core.security import create_access_token
 from datetime import datetime, timedelta
 
 router = APIRouter()
@@ -17,11 +16,12 @@ def signup_user(data: SignupRequest):
         })
         
         # Optional: Add extra user details to a users table
-        supabase.table("users").insert({
+        # (single upsert so a concurrent signup can't race the insert)
+        supabase.table("users").upsert({
             "email": data.email,
             "full_name": data.full_name or "",
             "created_at": datetime.utcnow().isoformat(),
-        }).execute()
+        }, on_conflict="email", ignore_duplicates=True).execute()
 
         return {"message": "Signup successful!", "user": result.user.email}
     except Exception as e:
@@ -40,12 +40,10 @@ def login_user(data: LoginRequest):
         if not response.user:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        payload = {
-            "sub": response.user.id,
-            "email": data.email,
-            "exp": datetime.utcnow() + timedelta(hours=2)
-        }
-        token = jwt.encode(payload, settings.JWT_SECRET, algorithm="HS256")
+        token = create_access_token(
+            {"sub": response.user.id, "email": data.email},
+            expires_delta=timedelta(hours=2)
+        )
 
         return {"access_token": token, "token_type": "bearer"}
     except Exception as e:
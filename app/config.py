@@ -1,3 +1,4 @@
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -7,11 +8,16 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_KEY: str
+    # Direct Postgres DSN for hot-path queries (optional; PostgREST is
+    # used when unset)
+    SUPABASE_DB_URL: str = ""
 
-    # JWT
-    SECRET_KEY: str
-    ALGORITHM: str = "HS256"
+    # JWT (older .env files name these JWT_SECRET / JWT_ALGORITHM)
+    SECRET_KEY: str = Field(validation_alias=AliasChoices("SECRET_KEY", "JWT_SECRET"))
+    ALGORITHM: str = Field(default="HS256", validation_alias=AliasChoices("ALGORITHM", "JWT_ALGORITHM"))
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Server-side pepper mixed into password hashes (optional but recommended)
+    PEPPER: str = ""
 
     # Gemini API
     GEMINI_API_KEY: str
@@ -27,6 +33,7 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = True
+        extra = "ignore"
 
 
 @lru_cache()
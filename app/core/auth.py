@@ -1,14 +1,31 @@
+import hashlib
+import time
+
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import jwt
-from app.schemas.config import settings
+from cachetools import TTLCache
+from app.core.security import decode_access_token
 
 security = HTTPBearer()
 
+# Cache decoded payloads keyed by a hash of the raw token so repeat
+# requests with the same token skip the HMAC verification
+_payload_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+
 def verify_jwt(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
-        return payload
-    except Exception:
+    token = credentials.credentials
+    key = hashlib.sha256(token.encode()).hexdigest()[:32]
+
+    payload = _payload_cache.get(key)
+    if payload is not None:
+        # The cache TTL may outlive the token, so re-check expiry
+        if payload.get("exp", 0) > time.time():
+            return payload
         raise HTTPException(status_code=403, detail="Invalid or expired token")
+
+    payload = decode_access_token(token)
+    if payload is None:
+        raise HTTPException(status_code=403, detail="Invalid or expired token")
+
+    _payload_cache[key] = payload
+    return payload
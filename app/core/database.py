@@ -1,20 +1,50 @@
+from functools import lru_cache
+
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
 from app.config import get_settings
 
-settings = get_settings()
+# Default httpx limits (100 connections, 20 keepalive) are too small for
+# 100+ concurrent clients hammering PostgREST
+HTTPX_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=50,
+    keepalive_expiry=30,
+)
+
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+def tune_postgrest_session(client: Client) -> Client:
+    """Swap the PostgREST httpx session for one with larger pool limits.
 
-# Service role client for admin operations
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+    supabase-py 2.10 offers no option to pass a custom httpx client, so
+    rebuild the session with the same settings plus our limits.
+    """
+    session = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        follow_redirects=True,
+        http2=True,
+        limits=HTTPX_LIMITS,
+    )
+    return client
 
 
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
-    """Get the Supabase client"""
-    return supabase
+    """Get the shared Supabase client (created once per process)"""
+    settings = get_settings()
+    return tune_postgrest_session(
+        create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    )
 
 
+@lru_cache(maxsize=1)
 def get_supabase_admin_client() -> Client:
-    """Get the Supabase admin client"""
-    return supabase_admin
+    """Get the shared service-role Supabase admin client"""
+    settings = get_settings()
+    return tune_postgrest_session(
+        create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+    )
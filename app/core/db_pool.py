@@ -0,0 +1,73 @@
+"""Direct asyncpg access to the Supabase Postgres for hot-path queries.
+
+Every PostgREST call pays JSON serialization, HTTP and TLS on top of the
+actual query. Simple primary-key lookups skip all of that by going
+straight to Postgres when SUPABASE_DB_URL is configured; handlers fall
+back to the Supabase SDK when it isn't.
+"""
+import asyncio
+from typing import Optional
+from uuid import uuid4
+
+import asyncpg
+
+from app.config import get_settings
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_pool() -> Optional[asyncpg.Pool]:
+    """Get the shared asyncpg pool, creating it on first use.
+
+    Returns None when no direct database URL is configured.
+    """
+    global _pool
+    settings = get_settings()
+    if not settings.SUPABASE_DB_URL:
+        return None
+
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                # statement_cache_size=0 and unique statement names keep
+                # this safe behind the pgbouncer transaction pooler (6543)
+                _pool = await asyncpg.create_pool(
+                    dsn=settings.SUPABASE_DB_URL,
+                    min_size=10,
+                    max_size=50,
+                    max_queries=50000,
+                    max_inactive_connection_lifetime=300,
+                    statement_cache_size=0,
+                    prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+                )
+    return _pool
+
+
+async def close_pool() -> None:
+    """Close the shared pool (shutdown hook)"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetch_user(user_id: str) -> Optional[dict]:
+    """Fetch a user row by primary key over the direct connection.
+
+    Returns None if the pool is not configured or the user is missing.
+    """
+    pool = await get_pool()
+    if pool is None:
+        return None
+
+    row = await pool.fetchrow(
+        "SELECT id, email, name, plan_type, created_at FROM users WHERE id = $1",
+        user_id,
+    )
+    if row is None:
+        return None
+
+    user = dict(row)
+    user["id"] = str(user["id"])
+    return user
@@ -0,0 +1,37 @@
+"""Conditional GET support for read endpoints.
+
+Dashboards poll the project and profile reads every few seconds; a weak
+ETag plus a short private Cache-Control lets clients short-circuit
+repeat reads with a 304 instead of re-transferring the body.
+"""
+import hashlib
+from typing import Optional
+
+import orjson
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, max-age=10"
+
+
+def compute_etag(payload) -> str:
+    """Weak ETag over the JSON-serializable payload"""
+    digest = hashlib.blake2b(
+        orjson.dumps(payload, default=str), digest_size=8
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def apply_cache_headers(request: Request, response: Response, payload) -> Optional[Response]:
+    """Attach ETag/Cache-Control headers for a cacheable read.
+
+    Returns a 304 response when the request's If-None-Match matches,
+    otherwise sets the headers on the outgoing response and returns None.
+    """
+    etag = compute_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
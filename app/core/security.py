@@ -1,41 +1,103 @@
-from datetime import datetime, timedelta
+import base64
+import hashlib
+import hmac
+import time
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
+
+import orjson
 from passlib.context import CryptContext
 from app.config import get_settings
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# argon2id with NIST-recommended parameters (~30ms per verify vs
+# ~100-200ms for bcrypt at default cost); bcrypt stays registered so
+# existing hashes keep verifying until they are rehashed on login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated=["bcrypt"],
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+)
+
+
+def _pepper(password: str) -> str:
+    """HMAC the password with the server-side pepper before hashing.
+
+    A database leak alone is then not enough for an offline attack.
+    """
+    return hmac.new(_PEPPER_KEY, password.encode(), hashlib.sha256).hexdigest()
+
+# Every token we issue uses the same header, so encode it once
+_JWT_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+_JWT_KEY = settings.SECRET_KEY.encode()
+_PEPPER_KEY = settings.PEPPER.encode()
+
+# The signing key never changes, so derive the HMAC pad state once and
+# copy the context per signature instead of re-keying every call
+_HMAC_PROTO = hmac.new(_JWT_KEY, None, hashlib.sha256)
+
+
+def _sign(signing_input: bytes) -> bytes:
+    h = _HMAC_PROTO.copy()
+    h.update(signing_input)
+    return h.digest()
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
+    """Verify a password against a hash (argon2 or legacy bcrypt)"""
+    if hashed_password.startswith("$argon2"):
+        return pwd_context.verify(_pepper(plain_password), hashed_password)
+    # Legacy bcrypt hashes predate the pepper, so verify the raw password
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return pwd_context.hash(_pepper(password))
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the stored hash should be regenerated (e.g. legacy bcrypt)"""
+    return pwd_context.needs_update(hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token"""
+    """Create an HS256 JWT access token"""
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = int(time.time() + expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = int(time.time() + timedelta(minutes=15).total_seconds())
 
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    signing_input = _JWT_HEADER + b"." + _b64url_encode(orjson.dumps(to_encode))
+    return (signing_input + b"." + _b64url_encode(_sign(signing_input))).decode()
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and validate a JWT token"""
+    """Decode and validate an HS256 JWT token"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        signing_input = f"{header_b64}.{payload_b64}".encode()
+        if not hmac.compare_digest(_sign(signing_input), _b64url_decode(signature_b64)):
+            return None
+
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, orjson.JSONDecodeError):
+        return None
+
+    if payload.get("exp", 0) <= time.time():
         return None
+
+    return payload
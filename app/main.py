@@ -1,23 +1,26 @@
-import io
 import base64
 import asyncio
+import os
+import tempfile
 import time
-import jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from fastapi import FastAPI, APIRouter, File, UploadFile, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Tuple, Optional
+from typing import BinaryIO, List, Tuple, Optional
 
 # --- Internal Imports ---
-from app.schemas.config import settings
+from app.config import get_settings
 
+settings = get_settings()
 
 from app.schemas.user import SignupRequest, LoginRequest
 from app.services.supabase_service import supabase
 from app.core.auth import verify_jwt
+from app.core.security import create_access_token
 
 # --- External Libraries ---
 import speech_recognition as sr
@@ -28,20 +31,23 @@ import pydub
 app = FastAPI(
     title="Verbatim",
     description="Speech-to-Text, Subtitle, Translation & Voice-Over Tool",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # --- CORS Configuration ---
-origins = [origin.strip() for origin in settings.CORS_ORIGINS.split(",")]
-if "*" not in origins:
-    origins.append("*")
+# No "*" entry: browsers refuse credentialed requests against a wildcard
+# origin, and explicit lists keep the middleware on its fast path
+origins = frozenset(
+    origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()
+)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
 
@@ -58,6 +64,89 @@ class TTSRequest(BaseModel):
     is_preview: bool = False
 
 
+# --- ACTIVITY LOGGING ---
+
+# Activity rows are queued and bulk-inserted in the background so
+# handlers don't pay a DB round-trip before responding
+_activity_queue: asyncio.Queue = asyncio.Queue()
+
+_ACTIVITY_FLUSH_INTERVAL = 0.5  # seconds
+_ACTIVITY_BATCH_SIZE = 100
+
+# Strong reference to the flusher task: the loop only keeps weak refs,
+# so an unreferenced task can be garbage-collected mid-flight
+_flush_task: Optional[asyncio.Task] = None
+
+
+def log_activity(email: Optional[str], action: str) -> None:
+    """Queue an activity row for background insertion."""
+    _activity_queue.put_nowait({
+        "email": email,
+        "action": action,
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+
+async def _flush_activities() -> None:
+    """Drain queued activity rows and bulk-insert them into Supabase."""
+    loop = asyncio.get_event_loop()
+    while True:
+        batch = [await _activity_queue.get()]
+        deadline = loop.time() + _ACTIVITY_FLUSH_INTERVAL
+
+        while len(batch) < _ACTIVITY_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_activity_queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await asyncio.to_thread(
+                lambda: supabase.table("user_activities").insert(batch).execute()
+            )
+        except Exception:
+            # Activity logging is best-effort; never take a request down with it
+            pass
+
+
+@app.on_event("startup")
+async def start_activity_flusher():
+    global _flush_task
+    _flush_task = asyncio.create_task(_flush_activities())
+
+
+@app.on_event("shutdown")
+async def stop_activity_flusher():
+    if _flush_task is not None:
+        _flush_task.cancel()
+
+
+@app.on_event("startup")
+async def warm_connections():
+    # Pay the TLS handshake and open a keepalive connection before the
+    # first real request hits the pool; HEAD + count transfers no rows
+    try:
+        await asyncio.to_thread(
+            lambda: supabase.table("users")
+            .select("id", count="exact", head=True)
+            .limit(1)
+            .execute()
+        )
+    except Exception:
+        pass
+
+
+@app.on_event("startup")
+async def configure_executor():
+    # Audio decodes run on the default executor; size it so a few large
+    # files can't queue out everything else
+    loop = asyncio.get_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=max(4, os.cpu_count() or 4)))
+
+
 # --- HELPER FUNCTIONS ---
 
 async def make_gemini_request(prompt: str, is_grounded: bool = False) -> str:
@@ -68,10 +157,13 @@ async def make_gemini_request(prompt: str, is_grounded: bool = False) -> str:
     return f"Generated text based on prompt: '{prompt}'"
 
 
-def process_media_for_subtitles(file_stream: io.BytesIO, language_code: str) -> Tuple[str, str, Optional[str]]:
+async def process_media_for_subtitles(file_stream: BinaryIO, language_code: str) -> Tuple[str, str, Optional[str]]:
     """Mock transcription logic."""
     try:
-        audio_segment = pydub.AudioSegment.from_file(file_stream, format="mp3")
+        # The ffmpeg decode is synchronous; run it off the event loop
+        audio_segment = await asyncio.to_thread(
+            pydub.AudioSegment.from_file, file_stream, format="mp3"
+        )
         duration_ms = len(audio_segment)
         full_text = f"This is a mock transcription of the audio file in language {language_code}. It lasted {duration_ms / 1000:.2f} seconds."
         srt_content = "1\n00:00:00,000 --> 00:00:05,000\nMock Subtitle Line 1\n\n2\n00:00:05,000 --> 00:00:10,000\nMock Subtitle Line 2"
@@ -113,11 +205,12 @@ def signup_user(data: SignupRequest):
         })
 
         # Optional: Add user to custom users table
-        supabase.table("users").insert({
+        # (single upsert so a concurrent signup can't race the insert)
+        supabase.table("users").upsert({
             "email": data.email,
             "full_name": data.full_name or "",
             "created_at": datetime.utcnow().isoformat(),
-        }).execute()
+        }, on_conflict="email", ignore_duplicates=True).execute()
 
         return {"message": "Signup successful!", "user": data.email}
     except Exception as e:
@@ -136,12 +229,10 @@ def login_user(data: LoginRequest):
         if not response.user:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        payload = {
-            "sub": response.user.id,
-            "email": data.email,
-            "exp": datetime.utcnow() + timedelta(hours=2)
-        }
-        token = jwt.encode(payload, settings.JWT_SECRET, algorithm="HS256")
+        token = create_access_token(
+            {"sub": response.user.id, "email": data.email},
+            expires_delta=timedelta(hours=2)
+        )
 
         return {"message": "Login successful!", "access_token": token, "token_type": "bearer"}
     except Exception as e:
@@ -172,18 +263,23 @@ async def transcribe_media(
     if not file.content_type or not file.content_type.startswith('audio/'):
         raise HTTPException(status_code=400, detail="Only audio files are supported.")
 
-    file_stream = io.BytesIO(await file.read())
-    final_text, srt_content, error_message = process_media_for_subtitles(file_stream, language_code)
+    # Stream the upload in chunks: small files stay in memory, large
+    # ones spill to disk instead of being buffered whole in RAM
+    tmp = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        while chunk := await file.read(1 << 20):
+            tmp.write(chunk)
+        tmp.seek(0)
+
+        final_text, srt_content, error_message = await process_media_for_subtitles(tmp, language_code)
+    finally:
+        tmp.close()
 
     if error_message:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {error_message}")
 
     # Log activity
-    supabase.table("user_activities").insert({
-        "email": user.get("email"),
-        "action": "transcription",
-        "timestamp": datetime.utcnow().isoformat()
-    }).execute()
+    log_activity(user.get("email"), "transcription")
 
     return {"full_text": final_text, "srt_content": srt_content}
 
@@ -200,11 +296,7 @@ async def handle_translation(
         raise HTTPException(status_code=500, detail=f"Translation error: {error_message}")
 
     # Log activity
-    supabase.table("user_activities").insert({
-        "email": user.get("email"),
-        "action": "translation",
-        "timestamp": datetime.utcnow().isoformat()
-    }).execute()
+    log_activity(user.get("email"), "translation")
 
     return {"translated_text": translated_text}
 
@@ -221,13 +313,9 @@ async def handle_tts(
         raise HTTPException(status_code=500, detail=f"Voice-over generation error: {error_message}")
 
     # Log activity
-    supabase.table("user_activities").insert({
-        "email": user.get("email"),
-        "action": "voiceover",
-        "timestamp": datetime.utcnow().isoformat()
-    }).execute()
+    log_activity(user.get("email"), "voiceover")
 
-    return JSONResponse(content={"audio_base64": audio_base64})
+    return ORJSONResponse(content={"audio_base64": audio_base64})
 
 
 # --- MAIN RUNNER ---
@@ -238,5 +326,8 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=True
+        workers=min(4, os.cpu_count() or 1),
+        loop="uvloop",
+        http="httptools",
+        backlog=2048
     )
@@ -1,10 +1,6 @@
-from supabase import create_client, Client
-from app.schemas.config import settings
+from supabase import Client
+from app.core.database import get_supabase_client
 
-
-print("SUPABASE_URL:", settings.SUPABASE_URL)
-print("SUPABASE_KEY (starts with):", settings.SUPABASE_KEY[:20])
-print("SUPABASE_SERVICE_KEY (starts with):", settings.SUPABASE_SERVICE_KEY[:20])
-
-# Use the PUBLIC ANON KEY for user auth
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+# Single shared anon-key instance, reused from the core factory so the
+# process holds exactly one client (and one httpx pool)
+supabase: Client = get_supabase_client()
@@ -78,6 +78,20 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_projects_updated_at BEFORE UPDATE ON projects
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Insert a user unless the email is already registered.
+-- Returns no rows on conflict, so signup detects duplicates in a single round-trip.
+CREATE OR REPLACE FUNCTION create_user_if_absent(
+    p_email VARCHAR,
+    p_name VARCHAR,
+    p_password_hash VARCHAR
+)
+RETURNS SETOF users AS $$
+    INSERT INTO users (email, name, password_hash, plan_type)
+    VALUES (p_email, p_name, p_password_hash, 'free')
+    ON CONFLICT (email) DO NOTHING
+    RETURNING *;
+$$ LANGUAGE sql;
+
 -- Enable Row Level Security
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE projects ENABLE ROW LEVEL SECURITY;